@@ -4,7 +4,9 @@ Command-line interface for diskwhy.
 
 import argparse
 import os
+import re
 import sys
+from operator import itemgetter
 from pathlib import Path
 
 from . import __version__
@@ -12,6 +14,27 @@ from . import core
 from . import formatting
 
 
+_SIZE_RE = re.compile(r"^([0-9]+\.?[0-9]*|\.[0-9]+)([A-Z]*)$")
+
+_SIZE_UNITS = {
+    # Binary units (base 1024)
+    "KIB": 1024,
+    "MIB": 1024 ** 2,
+    "GIB": 1024 ** 3,
+    "TIB": 1024 ** 4,
+    # SI units (base 1000)
+    "K": 1000,
+    "M": 1000 ** 2,
+    "G": 1000 ** 3,
+    "T": 1000 ** 4,
+    # Also support KB, MB, GB (treat as binary for compatibility)
+    "KB": 1024,
+    "MB": 1024 ** 2,
+    "GB": 1024 ** 3,
+    "TB": 1024 ** 4,
+}
+
+
 def parse_size(size_str):
     """
     Parse size string to bytes.
@@ -32,46 +55,63 @@ def parse_size(size_str):
     if not size_str:
         raise ValueError("Empty size string")
     
-    # Extract numeric part and unit
-    unit_start = 0
-    for i, char in enumerate(size_str):
-        if not char.isdigit() and char != '.':
-            unit_start = i
-            break
-    else:
+    match = _SIZE_RE.match(size_str)
+    if not match:
+        raise ValueError(f"Invalid size string: {size_str}")
+    
+    numeric_part, unit = match.groups()
+    
+    if not unit:
         # No unit found, assume bytes
-        return int(float(size_str))
+        return int(float(numeric_part))
+    
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Unknown size unit: {unit}. Supported: K, M, G, KiB, MiB, GiB, KB, MB, GB")
+    
+    return int(float(numeric_part) * _SIZE_UNITS[unit])
+
+
+def _size_type(size_str):
+    """
+    Argparse type converting a size string to bytes.
+    
+    Args:
+        size_str: Size string (e.g., "100M", "1G", "50KiB")
     
+    Returns:
+        int: Size in bytes
+    
+    Raises:
+        argparse.ArgumentTypeError: If size string is invalid
+    """
     try:
-        numeric_part = float(size_str[:unit_start])
+        return parse_size(size_str)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Invalid size format: {e}")
+
+
+def _jobs_type(jobs_str):
+    """
+    Argparse type converting a thread count, capped at core.MAX_JOBS.
+    
+    Args:
+        jobs_str: Number of threads (e.g., "4")
+    
+    Returns:
+        int: Number of threads
+    
+    Raises:
+        argparse.ArgumentTypeError: If the count is not a positive integer
+    """
+    try:
+        jobs = int(jobs_str)
     except ValueError:
-        raise ValueError(f"Invalid numeric part in size string: {size_str}")
-    
-    unit = size_str[unit_start:]
-    
-    # Define multipliers
-    multipliers = {
-        # Binary units (base 1024)
-        "KIB": 1024,
-        "MIB": 1024 ** 2,
-        "GIB": 1024 ** 3,
-        "TIB": 1024 ** 4,
-        # SI units (base 1000)
-        "K": 1000,
-        "M": 1000 ** 2,
-        "G": 1000 ** 3,
-        "T": 1000 ** 4,
-        # Also support KB, MB, GB (treat as binary for compatibility)
-        "KB": 1024,
-        "MB": 1024 ** 2,
-        "GB": 1024 ** 3,
-        "TB": 1024 ** 4,
-    }
+        jobs = 0
     
-    if unit not in multipliers:
-        raise ValueError(f"Unknown size unit: {unit}. Supported: K, M, G, KiB, MiB, GiB, KB, MB, GB")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"Invalid thread count: {jobs_str}")
     
-    return int(numeric_part * multipliers[unit])
+    return min(jobs, core.MAX_JOBS)
 
 
 def parse_arguments():
@@ -118,7 +158,7 @@ def parse_arguments():
     
     parser.add_argument(
         "--min-size",
-        type=str,
+        type=_size_type,
         metavar="SIZE",
         help="Only consider files larger than SIZE (e.g., 100M, 1G, 50KiB)",
     )
@@ -143,12 +183,26 @@ def parse_arguments():
         help="Also output results as JSON",
     )
     
+    parser.add_argument(
+        "--json-only",
+        action="store_true",
+        help="Output results only as JSON, without the human-readable report",
+    )
+    
     parser.add_argument(
         "--follow-symlinks",
         action="store_true",
         help="Follow symbolic links (default: skip them)",
     )
     
+    parser.add_argument(
+        "-j", "--jobs",
+        type=_jobs_type,
+        metavar="N",
+        help=f"Scan with N threads, at most {core.MAX_JOBS} "
+             "(default: automatic, 1 to scan serially)",
+    )
+    
     return parser.parse_args()
 
 
@@ -164,58 +218,38 @@ def main():
         print(f"Error: Path does not exist: {scan_path}", file=sys.stderr)
         sys.exit(1)
     
-    # Parse min_size
-    min_size_bytes = None
-    if args.min_size:
-        try:
-            min_size_bytes = parse_size(args.min_size)
-        except ValueError as e:
-            print(f"Error: Invalid size format: {e}", file=sys.stderr)
-            sys.exit(1)
-    
-    # Scan directory
+    # Scan directory, aggregating by directory and file type as it goes
     try:
-        files_list, skipped_paths = core.scan_directory(scan_path, follow_symlinks=args.follow_symlinks)
+        dir_sizes, type_sizes, largest_files, skipped_paths = core.scan_and_aggregate(
+            scan_path,
+            want_largest=args.show_large_files or 0,
+            follow_symlinks=args.follow_symlinks,
+            min_size=args.min_size,
+            older_than_days=args.older_than,
+            jobs=args.jobs
+        )
     except Exception as e:
         print(f"Error: Failed to scan directory: {e}", file=sys.stderr)
         sys.exit(1)
     
-    if not files_list:
+    total_size = sum(dir_sizes.values())
+    file_count = sum(data["file_count"] for data in type_sizes.values())
+    
+    if not file_count:
         print(f"No files found in: {scan_path}", file=sys.stderr)
         sys.exit(0)
     
-    # Calculate summary
-    total_size = sum(f["size"] for f in files_list)
-    file_count = len(files_list)
-    
-    # Aggregate by directory
-    dir_sizes = core.aggregate_by_directory(files_list)
     dir_count = len(dir_sizes)
     
-    # Get top directories
-    sorted_dirs = sorted(dir_sizes.items(), key=lambda x: x[1], reverse=True)
-    top_dirs = dict(sorted_dirs[:args.top_dirs])
-    
-    # Aggregate by file type
-    type_sizes = core.aggregate_by_filetype(files_list)
+    # Get top directories (dir_sizes is sorted by path, which orders ties)
+    top_dirs = core.top_n(dir_sizes.items(), args.top_dirs, key=itemgetter(1))
     
     # Get top file types
-    sorted_types = sorted(
+    top_types = core.top_n(
         type_sizes.items(),
-        key=lambda x: x[1]["total_size"],
-        reverse=True
+        args.top_types,
+        key=lambda x: x[1]["total_size"]
     )
-    top_types = dict(sorted_types[:args.top_types])
-    
-    # Get largest files (if requested)
-    largest_files = []
-    if args.show_large_files:
-        largest_files = core.get_largest_files(
-            files_list,
-            args.show_large_files,
-            min_size=min_size_bytes,
-            older_than_days=args.older_than
-        )
     
     # Prepare summary data
     summary_data = {
@@ -224,28 +258,31 @@ def main():
         "dir_count": dir_count,
     }
     
-    # Format and output
-    output = formatting.format_output(
-        summary_data,
-        top_dirs,
-        top_types,
-        largest_files,
-        skipped_paths
-    )
-    
-    print(output)
+    # Format and output (top_dirs/top_types are shared, already ordered)
+    if not args.json_only:
+        output = formatting.format_output(
+            summary_data,
+            top_dirs,
+            top_types,
+            largest_files,
+            skipped_paths
+        )
+        
+        print(output)
     
     # Output JSON if requested
-    if args.json:
-        json_output = formatting.to_json(
+    if args.json or args.json_only:
+        if not args.json_only:
+            print("\n--- JSON Output ---\n")
+        formatting.to_json(
             summary_data,
             top_dirs,
             top_types,
             largest_files,
-            skipped_paths
+            skipped_paths,
+            fp=sys.stdout
         )
-        print("\n--- JSON Output ---\n")
-        print(json_output)
+        sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -2,81 +2,574 @@
 Core scanning and aggregation logic for diskwhy.
 """
 
+import heapq
 import os
+import queue
 import stat
-from pathlib import Path
-from datetime import datetime, timedelta
+import threading
+import time
+from array import array
+from collections import defaultdict
+from functools import lru_cache
 
 
-def scan_directory(path, follow_symlinks=False):
+# When os.scandir() accepts a directory descriptor, DirEntry.stat() uses
+# fstatat(2) relative to it (as os.fwalk does) instead of resolving the full
+# path of every file. Checked once at import time.
+_SCANDIR_FD = os.scandir in os.supports_fd and os.stat in os.supports_dir_fd
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+# Upper bound on scanner threads; more only adds contention on the GIL
+MAX_JOBS = 32
+
+
+class FileTable:
+    """
+    Column-oriented table of scanned files.
+    
+    Each field is stored in its own column instead of one dict per file:
+    paths, parent directories and extensions as lists, sizes and modification
+    times as typed arrays. Indexing and iteration yield file info dictionaries
+    with "path", "dir", "size", "mtime" and "extension" keys; slicing yields
+    a list of them.
+    """
+    
+    def __init__(self):
+        self.paths = []
+        self.dirs = []
+        self.extensions = []
+        self.sizes = array("q")
+        self.mtimes = array("d")
+    
+    def __len__(self):
+        return len(self.paths)
+    
+    def __getitem__(self, index):
+        # Slices give a list of rows, like slicing the old list of dicts
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        
+        return {
+            "path": self.paths[index],
+            "dir": self.dirs[index],
+            "size": self.sizes[index],
+            "mtime": self.mtimes[index],
+            "extension": self.extensions[index],
+        }
+    
+    def __iter__(self):
+        columns = zip(self.paths, self.dirs, self.sizes, self.mtimes, self.extensions)
+        for path, directory, size, mtime, extension in columns:
+            yield {
+                "path": path,
+                "dir": directory,
+                "size": size,
+                "mtime": mtime,
+                "extension": extension,
+            }
+    
+    def append(self, path, directory, size, mtime, extension):
+        """
+        Add a file to the table.
+        
+        Args:
+            path: File path (str)
+            directory: Parent directory path (str)
+            size: Size in bytes
+            mtime: Modification time as a timestamp
+            extension: Extension as returned by _get_extension
+        """
+        self.paths.append(path)
+        self.dirs.append(directory)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.extensions.append(extension)
+    
+    def extend(self, other):
+        """
+        Append all files of another table.
+        
+        Args:
+            other: FileTable to append
+        """
+        self.paths.extend(other.paths)
+        self.dirs.extend(other.dirs)
+        self.sizes.extend(other.sizes)
+        self.mtimes.extend(other.mtimes)
+        self.extensions.extend(other.extensions)
+    
+    def select(self, indices):
+        """
+        Build a new table from the rows at the given indices.
+        
+        Args:
+            indices: Iterable of row indices
+        
+        Returns:
+            FileTable: Table with the selected rows, in the given order
+        """
+        if not isinstance(indices, (list, range)):
+            indices = list(indices)
+        
+        # Gather column by column rather than row by row
+        table = FileTable()
+        table.paths = [self.paths[index] for index in indices]
+        table.dirs = [self.dirs[index] for index in indices]
+        table.extensions = [self.extensions[index] for index in indices]
+        table.sizes = array("q", [self.sizes[index] for index in indices])
+        table.mtimes = array("d", [self.mtimes[index] for index in indices])
+        return table
+
+
+def scan_directory(path, follow_symlinks=False, jobs=None):
     """
     Recursively scan a directory and collect file information.
     
+    Directories are scanned concurrently by a pool of threads sharing one
+    work queue; the GIL is released during each scandir/stat system call.
+    When scanning in parallel, files are grouped by directory in path order
+    and skipped paths are sorted, so results do not depend on thread timing.
+    
     Args:
-        path: Path to scan (str or Path object)
+        path: Path to scan (str or Path object), used as given; resolve it
+              first to get absolute paths in the results
         follow_symlinks: Whether to follow symbolic links (default: False)
+        jobs: Number of scanner threads (None for automatic, 1 to scan serially),
+              at most MAX_JOBS
     
     Returns:
-        tuple: (files_list, skipped_paths) where files_list contains dicts with
+        tuple: (files_list, skipped_paths) where files_list is a FileTable with
                file information and skipped_paths is a list of paths that couldn't
                be accessed
     """
-    files_list = []
+    files_list = FileTable()
     skipped_paths = []
-    path = Path(path).resolve()
+    path = _scan_root(path, files_list, skipped_paths)
+    if path is None:
+        return files_list, skipped_paths
     
-    try:
-        if not path.exists():
-            skipped_paths.append(str(path))
-            return files_list, skipped_paths
+    jobs = _resolve_jobs(jobs)
+    if jobs <= 1:
+        _scan(path, follow_symlinks, files_list, skipped_paths)
+    else:
+        _scan_parallel(path, follow_symlinks, jobs, files_list, skipped_paths)
+    
+    return files_list, skipped_paths
+
+
+def scan_and_aggregate(path, want_largest=0, follow_symlinks=False,
+                       min_size=None, older_than_days=None, jobs=None):
+    """
+    Scan a directory and aggregate it without keeping a row per file.
+    
+    Fuses scan_directory, summarize and get_largest_files: each directory's
+    files are folded into the directory and file type totals and a heap of
+    the N largest files as soon as it has been listed, then dropped. Memory
+    use grows with the number of directories and extensions rather than the
+    number of files. When scanning in parallel, every thread folds into its
+    own totals and heap, which are merged at the end.
+    
+    Results do not depend on the number of threads: directories, file types
+    and skipped paths are sorted, and largest files of equal size are
+    ordered by path.
+    
+    Args:
+        path: Path to scan (str or Path object), used as given
+        want_largest: Number of largest files to keep (0 for none)
+        follow_symlinks: Whether to follow symbolic links (default: False)
+        min_size: Minimum size of the largest files in bytes (None to skip
+                  size filter); the totals always include every file
+        older_than_days: Only keep largest files older than this many days
+                         (None to skip age filter)
+        jobs: Number of scanner threads (None for automatic, 1 to scan serially),
+              at most MAX_JOBS
+    
+    Returns:
+        tuple: (dir_sizes, type_sizes, largest_files, skipped_paths) with the
+               same shapes as returned by aggregate_by_directory,
+               aggregate_by_filetype, get_largest_files and scan_directory
+    """
+    # One cutoff for the whole scan, however long it takes
+    cutoff_timestamp = _age_cutoff(older_than_days)
+    totals = _Aggregator(want_largest, min_size, cutoff_timestamp)
+    skipped_paths = []
+    
+    batch = FileTable()
+    root = _scan_root(path, batch, skipped_paths)
+    if batch:
+        totals.add(batch)
+    
+    if root is not None:
+        jobs = _resolve_jobs(jobs)
+        if jobs <= 1:
+            stack = [root]
+            while stack:
+                batch = FileTable()
+                stack.extend(_scan_dir(stack.pop(), follow_symlinks, batch, skipped_paths))
+                if batch:
+                    totals.add(batch)
+        else:
+            workers = [
+                _Aggregator(want_largest, min_size, cutoff_timestamp)
+                for _ in range(jobs)
+            ]
+            _walk_parallel(
+                root,
+                follow_symlinks,
+                [worker.add for worker in workers],
+                skipped_paths
+            )
+            for worker in workers:
+                totals.merge(worker)
+    
+    skipped_paths.sort()
+    dir_sizes, type_sizes, largest_files = totals.results()
+    return dir_sizes, type_sizes, largest_files, skipped_paths
+
+
+class _Aggregator:
+    """
+    Running directory and file type totals and largest files of a scan.
+    
+    Batches hold the files of one directory, as recorded by _scan_dir. The
+    largest files are kept in a min-heap of (size, _Reversed(path), file
+    info) entries, so the smallest file is evicted first and, among files
+    of equal size, the one whose path sorts last.
+    """
+    
+    def __init__(self, want_largest, min_size, cutoff_timestamp):
+        self.want_largest = want_largest
+        self.min_size = min_size
+        self.cutoff_timestamp = cutoff_timestamp
+        self.dir_sizes = defaultdict(int)
+        self.type_totals = defaultdict(lambda: [0, 0])
+        self.heap = []
+    
+    def add(self, batch):
+        """
+        Fold a batch of files into the totals.
         
-        if not path.is_dir():
-            # If it's a file, process it directly
-            try:
-                file_stat = path.stat()
-                file_info = {
-                    "path": str(path),
-                    "size": file_stat.st_size,
-                    "mtime": file_stat.st_mtime,
-                    "extension": _get_extension(path.name),
-                }
-                files_list.append(file_info)
-            except (OSError, PermissionError) as e:
-                skipped_paths.append(str(path))
-            return files_list, skipped_paths
+        Args:
+            batch: FileTable with the files of a single directory
+        """
+        self.dir_sizes[batch.dirs[0]] += sum(batch.sizes)
+        
+        type_totals = self.type_totals
+        for ext, size in zip(batch.extensions, batch.sizes):
+            totals = type_totals[ext]
+            totals[0] += size
+            totals[1] += 1
+        
+        if not self.want_largest:
+            return
+        
+        heap = self.heap
+        sizes = batch.sizes
+        paths = batch.paths
+        for index in _match_indices(batch, self.min_size, self.cutoff_timestamp):
+            size = sizes[index]
+            # Most files are smaller than every kept one, skip them cheaply
+            if heap and size < heap[0][0] and len(heap) >= self.want_largest:
+                continue
+            if self._keeps(size, paths[index]):
+                self._push(size, paths[index], batch[index])
+    
+    def merge(self, other):
+        """
+        Add the totals and largest files of another aggregator.
+        
+        Args:
+            other: _Aggregator of the same scan
+        """
+        for directory, size in other.dir_sizes.items():
+            self.dir_sizes[directory] += size
         
-        # Use os.walk for efficient directory traversal
-        for root, dirs, filenames in os.walk(path, followlinks=follow_symlinks):
-            root_path = Path(root)
-            
-            # Process files in current directory
-            for filename in filenames:
-                file_path = root_path / filename
-                
-                # Skip symlinks if not following them
-                if not follow_symlinks:
+        for ext, other_totals in other.type_totals.items():
+            totals = self.type_totals[ext]
+            totals[0] += other_totals[0]
+            totals[1] += other_totals[1]
+        
+        for size, path, info in other.heap:
+            if self._keeps(size, path.value):
+                self._push(size, path.value, info)
+    
+    def results(self):
+        """
+        Build the final, sorted results.
+        
+        Returns:
+            tuple: (dir_sizes, type_sizes, largest_files)
+        """
+        dir_sizes = dict(sorted(self.dir_sizes.items()))
+        type_sizes = {
+            ext: {"total_size": totals[0], "file_count": totals[1]}
+            for ext, totals in sorted(self.type_totals.items())
+        }
+        # Largest first, equal sizes by path
+        largest_files = [info for _, _, info in sorted(self.heap, reverse=True)]
+        return dir_sizes, type_sizes, largest_files
+    
+    def _keeps(self, size, path):
+        heap = self.heap
+        if len(heap) < self.want_largest:
+            return True
+        smallest_size, smallest_path, _ = heap[0]
+        return size > smallest_size or (size == smallest_size and path < smallest_path.value)
+    
+    def _push(self, size, path, info):
+        entry = (size, _Reversed(path), info)
+        if len(self.heap) < self.want_largest:
+            heapq.heappush(self.heap, entry)
+        else:
+            heapq.heapreplace(self.heap, entry)
+
+
+class _Reversed:
+    """Wrapper ordering values in reverse, for heap tie-breaks."""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def __lt__(self, other):
+        return other.value < self.value
+    
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _resolve_jobs(jobs):
+    """
+    Get the number of scanner threads to use.
+    
+    Args:
+        jobs: Requested number of threads (None for automatic)
+    
+    Returns:
+        int: Number of threads, at most MAX_JOBS
+    """
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) * 4
+    return min(jobs, MAX_JOBS)
+
+
+def _scan_root(path, files_list, skipped_paths):
+    """
+    Prepare the root path of a scan.
+    
+    A root that is a file is recorded directly, one that cannot be accessed
+    is recorded as skipped.
+    
+    Args:
+        path: Path to scan (str or Path object)
+        files_list: FileTable that a file root is appended to
+        skipped_paths: List that an inaccessible root is appended to
+    
+    Returns:
+        str: Directory path to scan, or None if there is nothing left to scan
+    """
+    # Callers such as cli.main already resolve the path; resolving again
+    # would repeat the stat/readlink chain over every parent component.
+    # Work on plain strings and drop trailing separators like Path() does.
+    path = os.fspath(path)
+    path = path.rstrip(os.sep) or path[:1]
+    
+    try:
+        # A single stat both checks existence and tells files from directories
+        path_stat = os.stat(path)
+    except (OSError, PermissionError):
+        skipped_paths.append(path)
+        return None
+    
+    if not stat.S_ISDIR(path_stat.st_mode):
+        # If it's a file, process it directly
+        files_list.append(
+            path,
+            os.path.dirname(path) or os.curdir,
+            path_stat.st_size,
+            path_stat.st_mtime,
+            _get_extension(os.path.basename(path)),
+        )
+        return None
+    
+    return path
+
+
+def _scan_parallel(dir_path, follow_symlinks, jobs, files_list, skipped_paths):
+    """
+    Recursively scan a directory into a table with a pool of worker threads.
+    
+    Workers finish in no fixed order, so the per-directory tables are merged
+    sorted by directory path and the skipped paths are sorted: the same tree
+    always gives the same results.
+    
+    Args:
+        dir_path: Directory path (str)
+        follow_symlinks: Whether to follow symbolic links
+        jobs: Number of worker threads
+        files_list: FileTable that files are appended to
+        skipped_paths: List that inaccessible paths are appended to
+    """
+    # list.append is atomic, so the workers can share one list
+    batches = []
+    skipped = []
+    _walk_parallel(dir_path, follow_symlinks, [batches.append] * jobs, skipped)
+    
+    # Each directory is scanned once, so its path identifies its batch.
+    # Pop batches off the end while merging so each is freed once copied.
+    batches.sort(key=lambda batch: batch.dirs[0], reverse=True)
+    while batches:
+        files_list.extend(batches.pop())
+    skipped_paths.extend(sorted(skipped))
+
+
+def _walk_parallel(dir_path, follow_symlinks, consumers, skipped_paths):
+    """
+    Recursively scan a directory with a pool of worker threads.
+    
+    Each worker pops a directory from a shared queue, scans it into a table
+    of its own and pushes the subdirectories it found back onto the queue, so
+    the load stays balanced however unevenly the tree is shaped.
+    Subdirectories are queued before their parent is marked done, which lets
+    Queue.join() detect when the whole tree has been scanned.
+    
+    Args:
+        dir_path: Directory path (str)
+        follow_symlinks: Whether to follow symbolic links
+        consumers: One callable per worker thread, called by that thread only
+                   with the FileTable of each non-empty directory it scans
+        skipped_paths: List that inaccessible paths are appended to, in no
+                       particular order
+    """
+    # LIFO order keeps each worker close to a depth-first walk
+    pending = queue.LifoQueue()
+    pending.put(dir_path)
+    errors = []
+    
+    def worker(consume):
+        while True:
+            current = pending.get()
+            if current is None:
+                return
+            try:
+                batch = FileTable()
+                for subdir in _scan_dir(current, follow_symlinks, batch, skipped_paths):
+                    pending.put(subdir)
+                if batch:
+                    consume(batch)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                pending.task_done()
+    
+    threads = [
+        threading.Thread(target=worker, args=(consume,), daemon=True)
+        for consume in consumers
+    ]
+    for thread in threads:
+        thread.start()
+    
+    pending.join()
+    
+    # Wake up and stop the idle workers
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    
+    if errors:
+        raise errors[0]
+
+
+def _scan(dir_path, follow_symlinks, files_list, skipped_paths):
+    """
+    Recursively scan a directory, depth-first.
+    
+    Uses an explicit stack instead of recursion, so the tree depth is not
+    limited by Python's recursion limit.
+    
+    Args:
+        dir_path: Directory path (str)
+        follow_symlinks: Whether to follow symbolic links
+        files_list: FileTable that files are appended to
+        skipped_paths: List that inaccessible paths are appended to
+    """
+    stack = [dir_path]
+    
+    while stack:
+        subdirs = _scan_dir(stack.pop(), follow_symlinks, files_list, skipped_paths)
+        # Reversed so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def _scan_dir(dir_path, follow_symlinks, files_list, skipped_paths):
+    """
+    Scan the entries of a single directory using os.scandir.
+    
+    DirEntry caches the file type returned by the directory listing, so the
+    symlink and directory checks usually need no extra system call and only
+    files are stat'ed. Where supported, the directory is opened as a
+    descriptor so those stat calls are relative to it.
+    
+    Args:
+        dir_path: Directory path (str)
+        follow_symlinks: Whether to follow symbolic links
+        files_list: FileTable that files are appended to
+        skipped_paths: List that inaccessible paths are appended to
+    
+    Returns:
+        list: Paths of the subdirectories to scan next
+    """
+    subdirs = []
+    # Every file recorded below shares this one dir_path object. It is not
+    # interned: interned strings are immortal on CPython 3.12, which would
+    # keep every scanned directory path alive for the whole process.
+    prefix = os.path.join(dir_path, "")
+    
+    # Bind the per-file callables to locals once per directory; the loop
+    # below runs for every file and attribute lookups dominate its cost
+    add_path = files_list.paths.append
+    add_dir = files_list.dirs.append
+    add_size = files_list.sizes.append
+    add_mtime = files_list.mtimes.append
+    add_extension = files_list.extensions.append
+    get_extension = _get_extension
+    
+    try:
+        target = os.open(dir_path, _DIR_OPEN_FLAGS) if _SCANDIR_FD else dir_path
+        try:
+            with os.scandir(target) as it:
+                for entry in it:
+                    name = entry.name
+                    entry_path = prefix + name
                     try:
-                        if file_path.is_symlink():
+                        # Skip symlinks if not following them. Fast d_type path:
+                        # is_symlink() and is_dir() use the type reported by
+                        # the directory listing and only fall back to lstat on
+                        # filesystems that report DT_UNKNOWN
+                        if not follow_symlinks and entry.is_symlink():
+                            continue
+                        
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            subdirs.append(entry_path)
                             continue
-                    except OSError:
-                        pass
-                
-                try:
-                    file_stat = file_path.stat()
-                    file_info = {
-                        "path": str(file_path),
-                        "size": file_stat.st_size,
-                        "mtime": file_stat.st_mtime,
-                        "extension": _get_extension(filename),
-                    }
-                    files_list.append(file_info)
-                except (OSError, PermissionError):
-                    skipped_paths.append(str(file_path))
-    
-    except (OSError, PermissionError) as e:
-        skipped_paths.append(str(path))
+                        
+                        file_stat = entry.stat(follow_symlinks=follow_symlinks)
+                        add_path(entry_path)
+                        add_dir(dir_path)
+                        add_size(file_stat.st_size)
+                        add_mtime(file_stat.st_mtime)
+                        add_extension(get_extension(name))
+                    except (OSError, PermissionError):
+                        skipped_paths.append(entry_path)
+        finally:
+            if _SCANDIR_FD:
+                os.close(target)
+    except (OSError, PermissionError):
+        skipped_paths.append(dir_path)
     
-    return files_list, skipped_paths
+    return subdirs
 
 
 def _get_extension(filename):
@@ -89,19 +582,32 @@ def _get_extension(filename):
     Returns:
         str: Extension (e.g., ".txt") or "no extension" if none
     """
-    if not filename or filename == ".":
-        return "no extension"
+    head, _, suffix = filename.rpartition(".")
     
-    # Handle hidden files (e.g., .bashrc)
-    if filename.startswith(".") and "." not in filename[1:]:
+    # No dot, a leading dot only (hidden files such as .bashrc) or a trailing dot
+    if not head or not suffix:
         return "no extension"
     
-    # Get the extension
-    parts = filename.rsplit(".", 1)
-    if len(parts) == 2 and parts[1]:
-        return "." + parts[1].lower()
+    return _normalize_extension(suffix)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_extension(suffix):
+    """
+    Build the lowercase extension for a suffix.
+    
+    Extensions repeat heavily across a scan, so results are cached and every
+    file with the same extension shares one string object. They are not
+    interned, as that would keep every distinct suffix alive for the whole
+    process on CPython 3.12.
+    
+    Args:
+        suffix: Extension without the leading dot (e.g., "TXT")
     
-    return "no extension"
+    Returns:
+        str: Lowercased extension with the leading dot (e.g., ".txt")
+    """
+    return "." + suffix.lower()
 
 
 def aggregate_by_directory(files_list):
@@ -109,23 +615,31 @@ def aggregate_by_directory(files_list):
     Aggregate file sizes by directory.
     
     Args:
-        files_list: List of file info dictionaries
+        files_list: FileTable of scanned files
     
     Returns:
         dict: Mapping of directory paths to total sizes (in bytes)
     """
-    dir_sizes = {}
+    dir_sizes = defaultdict(int)
     
-    for file_info in files_list:
-        file_path = Path(file_info["path"])
-        directory = str(file_path.parent)
-        size = file_info["size"]
-        
-        if directory not in dir_sizes:
-            dir_sizes[directory] = 0
-        dir_sizes[directory] += size
+    # Parent directories are recorded at scan time as one shared string per
+    # directory, and a directory's files are stored next to each other. Sum
+    # each run of rows locally and only touch the dict when the run ends.
+    directory = None
+    run_size = 0
+    
+    for row_dir, size in zip(files_list.dirs, files_list.sizes):
+        if row_dir is not directory:
+            if directory is not None:
+                dir_sizes[directory] += run_size
+            directory = row_dir
+            run_size = 0
+        run_size += size
     
-    return dir_sizes
+    if directory is not None:
+        dir_sizes[directory] += run_size
+    
+    return dict(dir_sizes)
 
 
 def aggregate_by_filetype(files_list):
@@ -133,24 +647,83 @@ def aggregate_by_filetype(files_list):
     Aggregate file sizes by file extension/type.
     
     Args:
-        files_list: List of file info dictionaries
+        files_list: FileTable of scanned files
     
     Returns:
         dict: Mapping of extensions to dicts with "total_size" and "file_count"
     """
-    type_sizes = {}
+    # [total_size, file_count] lists are cheaper to update than dicts
+    type_totals = defaultdict(lambda: [0, 0])
     
-    for file_info in files_list:
-        ext = file_info["extension"]
-        size = file_info["size"]
-        
-        if ext not in type_sizes:
-            type_sizes[ext] = {"total_size": 0, "file_count": 0}
-        
-        type_sizes[ext]["total_size"] += size
-        type_sizes[ext]["file_count"] += 1
+    for ext, size in zip(files_list.extensions, files_list.sizes):
+        totals = type_totals[ext]
+        totals[0] += size
+        totals[1] += 1
+    
+    return {
+        ext: {"total_size": totals[0], "file_count": totals[1]}
+        for ext, totals in type_totals.items()
+    }
+
+
+def summarize(files_list):
+    """
+    Compute the total size and both aggregations in a single pass.
+    
+    Equivalent to summing all sizes and calling aggregate_by_directory and
+    aggregate_by_filetype, but walks the table only once.
+    
+    Args:
+        files_list: FileTable of scanned files
+    
+    Returns:
+        tuple: (total_size, dir_sizes, type_sizes) with the same shapes as
+               returned by aggregate_by_directory and aggregate_by_filetype
+    """
+    total_size = 0
+    dir_sizes = defaultdict(int)
+    type_totals = defaultdict(lambda: [0, 0])
+    
+    # Directory runs are summed as in aggregate_by_directory
+    directory = None
+    run_size = 0
+    
+    for row_dir, ext, size in zip(files_list.dirs, files_list.extensions, files_list.sizes):
+        if row_dir is not directory:
+            if directory is not None:
+                dir_sizes[directory] += run_size
+                total_size += run_size
+            directory = row_dir
+            run_size = 0
+        run_size += size
+        totals = type_totals[ext]
+        totals[0] += size
+        totals[1] += 1
+    
+    if directory is not None:
+        dir_sizes[directory] += run_size
+        total_size += run_size
+    
+    type_sizes = {
+        ext: {"total_size": totals[0], "file_count": totals[1]}
+        for ext, totals in type_totals.items()
+    }
+    
+    return total_size, dict(dir_sizes), type_sizes
+
+
+def path_index(files_list):
+    """
+    Map each file path to its row index for constant-time lookups.
+    
+    Args:
+        files_list: FileTable of scanned files
     
-    return type_sizes
+    Returns:
+        dict: Mapping of file paths to row indices
+    """
+    paths = files_list.paths
+    return dict(zip(paths, range(len(paths))))
 
 
 def filter_files(files_list, min_size=None, older_than_days=None):
@@ -158,35 +731,106 @@ def filter_files(files_list, min_size=None, older_than_days=None):
     Filter files based on size and age criteria.
     
     Args:
-        files_list: List of file info dictionaries
+        files_list: FileTable of scanned files
         min_size: Minimum file size in bytes (None to skip size filter)
         older_than_days: Files older than this many days (None to skip age filter)
     
     Returns:
-        list: Filtered list of file info dictionaries
+        FileTable: Table with the matching files (files_list itself if no
+                   filter is given)
     """
-    filtered = []
-    cutoff_time = None
+    if min_size is None and older_than_days is None:
+        return files_list
     
-    if older_than_days is not None:
-        cutoff_time = datetime.now() - timedelta(days=older_than_days)
-        cutoff_timestamp = cutoff_time.timestamp()
-    else:
-        cutoff_timestamp = None
+    return files_list.select(_filter_indices(files_list, min_size, older_than_days))
+
+
+def _filter_indices(files_list, min_size, older_than_days):
+    """
+    Get the row indices of files matching size and age criteria.
     
-    for file_info in files_list:
-        # Apply size filter
-        if min_size is not None and file_info["size"] < min_size:
-            continue
-        
-        # Apply age filter
-        if cutoff_timestamp is not None:
-            if file_info["mtime"] > cutoff_timestamp:
-                continue
-        
-        filtered.append(file_info)
+    Args:
+        files_list: FileTable of scanned files
+        min_size: Minimum file size in bytes (None to skip size filter)
+        older_than_days: Files older than this many days (None to skip age filter)
+    
+    Returns:
+        Sequence of matching row indices, in table order
+    """
+    return _match_indices(files_list, min_size, _age_cutoff(older_than_days))
+
+
+def _age_cutoff(older_than_days):
+    """
+    Get the modification time cutoff for an age filter.
+    
+    Args:
+        older_than_days: Files older than this many days (None to skip age filter)
     
-    return filtered
+    Returns:
+        float: Timestamp files must not be newer than, or None
+    """
+    if older_than_days is None:
+        return None
+    
+    # Plain seconds avoid the hour offset naive local datetimes get across
+    # DST changes
+    return time.time() - older_than_days * 86400
+
+
+def _match_indices(files_list, min_size, cutoff_timestamp):
+    """
+    Get the row indices of files matching a size and a timestamp cutoff.
+    
+    Args:
+        files_list: FileTable of scanned files
+        min_size: Minimum file size in bytes (None to skip size filter)
+        cutoff_timestamp: Latest modification time (None to skip age filter)
+    
+    Returns:
+        Sequence of matching row indices, in table order
+    """
+    # Select the loop for the active filters once instead of per file
+    if min_size is None and cutoff_timestamp is None:
+        return range(len(files_list))
+    
+    if cutoff_timestamp is None:
+        return [
+            index for index, size in enumerate(files_list.sizes)
+            if size >= min_size
+        ]
+    
+    if min_size is None:
+        return [
+            index for index, mtime in enumerate(files_list.mtimes)
+            if mtime <= cutoff_timestamp
+        ]
+    
+    return [
+        index
+        for index, (size, mtime) in enumerate(zip(files_list.sizes, files_list.mtimes))
+        if size >= min_size and mtime <= cutoff_timestamp
+    ]
+
+
+def top_k_by_size(files_list, k, min_size=None, older_than_days=None):
+    """
+    Get the row indices of the K largest files matching size and age criteria.
+    
+    Only row indices and the sizes column are touched while ranking, no
+    filtered table or per-file dictionaries are built.
+    
+    Args:
+        files_list: FileTable of scanned files
+        k: Number of files to return
+        min_size: Minimum file size in bytes (None to skip size filter)
+        older_than_days: Files older than this many days (None to skip age filter)
+    
+    Returns:
+        list: Row indices of the top K files, sorted by size (largest first)
+    """
+    indices = _filter_indices(files_list, min_size, older_than_days)
+    return top_n(indices, k, key=files_list.sizes.__getitem__)
 
 
 def get_largest_files(files_list, n, min_size=None, older_than_days=None):
@@ -194,7 +838,7 @@ def get_largest_files(files_list, n, min_size=None, older_than_days=None):
     Get the N largest files, optionally filtered by size and age.
     
     Args:
-        files_list: List of file info dictionaries
+        files_list: FileTable of scanned files
         n: Number of files to return
         min_size: Minimum file size in bytes (None to skip size filter)
         older_than_days: Files older than this many days (None to skip age filter)
@@ -202,11 +846,28 @@ def get_largest_files(files_list, n, min_size=None, older_than_days=None):
     Returns:
         list: Top N file info dictionaries, sorted by size (largest first)
     """
-    # Apply filters
-    filtered = filter_files(files_list, min_size=min_size, older_than_days=older_than_days)
+    # Only build dicts for the winners
+    indices = top_k_by_size(files_list, n, min_size=min_size, older_than_days=older_than_days)
+    return [files_list[index] for index in indices]
+
+
+def top_n(items, n, key):
+    """
+    Get the N largest items by key, largest first.
+    
+    Equivalent to sorted(items, key=key, reverse=True)[:n], but keeps only an
+    N-sized heap when N is small compared to the number of items.
+    
+    Args:
+        items: Sized collection of items (e.g., list or dict items view)
+        n: Number of items to return
+        key: Function extracting the comparison key from an item
     
-    # Sort by size (descending)
-    sorted_files = sorted(filtered, key=lambda x: x["size"], reverse=True)
+    Returns:
+        list: Top N items, sorted by key (largest first)
+    """
+    # A full sort is cheaper once N approaches the input size
+    if n >= len(items) // 2:
+        return sorted(items, key=key, reverse=True)[:n]
     
-    # Return top N
-    return sorted_files[:n]
+    return heapq.nlargest(n, items, key=key)
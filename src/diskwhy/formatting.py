@@ -2,9 +2,19 @@
 Output formatting functions for diskwhy.
 """
 
+import codecs
+import itertools
 import json
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_SIZE_UNITS = ("B", "KiB", "MiB", "GiB", "TiB", "PiB")
+
 
 def format_size(size_bytes):
     """
@@ -19,21 +29,14 @@ def format_size(size_bytes):
     if size_bytes < 1024:
         return f"{size_bytes} B"
     
-    units = ["KiB", "MiB", "GiB", "TiB"]
-    unit_index = 0
-    size = float(size_bytes)
-    
-    while size >= 1024.0 and unit_index < len(units) - 1:
-        size /= 1024.0
-        unit_index += 1
+    # Each binary unit is 10 bits, so the unit follows from the bit length
+    unit_index = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    size = size_bytes / (1 << (unit_index * 10))
     
     # Format with appropriate precision
     if size >= 100:
-        return f"{size:.1f} {units[unit_index]}"
-    elif size >= 10:
-        return f"{size:.2f} {units[unit_index]}"
-    else:
-        return f"{size:.2f} {units[unit_index]}"
+        return f"{size:.1f} {_SIZE_UNITS[unit_index]}"
+    return f"{size:.2f} {_SIZE_UNITS[unit_index]}"
 
 
 def format_percentage(part, total):
@@ -49,8 +52,43 @@ def format_percentage(part, total):
     """
     if total == 0:
         return "0.0%"
-    percentage = (part / total) * 100
-    return f"{percentage:.1f}%"
+    return f"{part / total * 100:.1f}%"
+
+
+def _percent_formatter(total):
+    """
+    Build a percentage formatter for a fixed total.
+    
+    Table rows share one total, so the zero check is done once here instead
+    of once per row. Rounds exactly like format_percentage.
+    
+    Args:
+        total: Total value
+    
+    Returns:
+        callable: Function mapping a part value to a percentage string
+    """
+    if total == 0:
+        return lambda part: "0.0%"
+    
+    # part * (100 / total) would round differently for some values
+    return lambda part: f"{part / total * 100:.1f}%"
+
+
+def _truncate(text, width=48):
+    """
+    Shorten text to at most width characters, keeping its end.
+    
+    Args:
+        text: Text to shorten (e.g., a path)
+        width: Maximum length
+    
+    Returns:
+        str: text itself, or "..." followed by its last width - 3 characters
+    """
+    if len(text) <= width:
+        return text
+    return "..." + text[3 - width:]
 
 
 def format_summary(total_size, file_count, dir_count, skipped_paths):
@@ -85,73 +123,67 @@ def format_summary(total_size, file_count, dir_count, skipped_paths):
     return "\n".join(lines)
 
 
-def format_top_directories(dirs_dict, total_size, n):
+def format_top_directories(top_dirs, total_size, n):
     """
     Format top directories table.
     
     Args:
-        dirs_dict: Dictionary mapping directory paths to sizes
+        top_dirs: List of (directory, size) tuples (already sorted)
         total_size: Total size for percentage calculation
         n: Number of directories to show
     
     Returns:
         str: Formatted table text
     """
-    if not dirs_dict:
+    if not top_dirs:
         return ""
     
-    # Sort by size and get top N
-    sorted_dirs = sorted(dirs_dict.items(), key=lambda x: x[1], reverse=True)[:n]
-    
     lines = []
     lines.append("Top directories by size")
     lines.append("=" * 70)
     lines.append(f"{'Directory':<50} {'Size':>12} {'Percentage':>10}")
     lines.append("-" * 70)
     
-    for directory, size in sorted_dirs:
-        # Truncate long directory names
-        display_dir = directory if len(directory) <= 48 else "..." + directory[-45:]
+    to_percentage = _percent_formatter(total_size)
+    
+    for directory, size in top_dirs[:n]:
+        display_dir = _truncate(directory)
         size_str = format_size(size)
-        percentage = format_percentage(size, total_size)
+        percentage = to_percentage(size)
         lines.append(f"{display_dir:<50} {size_str:>12} {percentage:>10}")
     
     lines.append("")
     return "\n".join(lines)
 
 
-def format_top_filetypes(types_dict, total_size, n):
+def format_top_filetypes(top_types, total_size, n):
     """
     Format top file types table.
     
     Args:
-        types_dict: Dictionary mapping extensions to dicts with "total_size" and "file_count"
+        top_types: List of (extension, data) tuples where data is a dict with
+                   "total_size" and "file_count" (already sorted)
         total_size: Total size for percentage calculation
         n: Number of file types to show
     
     Returns:
         str: Formatted table text
     """
-    if not types_dict:
+    if not top_types:
         return ""
     
-    # Sort by size and get top N
-    sorted_types = sorted(
-        types_dict.items(),
-        key=lambda x: x[1]["total_size"],
-        reverse=True
-    )[:n]
-    
     lines = []
     lines.append("Top file types by size")
     lines.append("=" * 70)
     lines.append(f"{'Extension':<20} {'Size':>12} {'Files':>10} {'Percentage':>10}")
     lines.append("-" * 70)
     
-    for ext, data in sorted_types:
+    to_percentage = _percent_formatter(total_size)
+    
+    for ext, data in top_types[:n]:
         size_str = format_size(data["total_size"])
         file_count = data["file_count"]
-        percentage = format_percentage(data["total_size"], total_size)
+        percentage = to_percentage(data["total_size"])
         lines.append(f"{ext:<20} {size_str:>12} {file_count:>10,} {percentage:>10}")
     
     lines.append("")
@@ -183,8 +215,7 @@ def format_largest_files(files_list, n):
     
     for file_info in top_files:
         file_path = file_info["path"]
-        # Truncate long file paths
-        display_path = file_path if len(file_path) <= 48 else "..." + file_path[-45:]
+        display_path = _truncate(file_path)
         size_str = format_size(file_info["size"])
         lines.append(f"{display_path:<50} {size_str:>12}")
     
@@ -198,8 +229,8 @@ def format_output(summary_data, top_dirs, top_types, largest_files, skipped_path
     
     Args:
         summary_data: Dict with "total_size", "file_count", "dir_count"
-        top_dirs: Dictionary of top directories with sizes
-        top_types: Dictionary of top file types with sizes and counts
+        top_dirs: List of (directory, size) tuples (already sorted)
+        top_types: List of (extension, data) tuples (already sorted)
         largest_files: List of largest file info dictionaries
         skipped_paths: List of skipped paths
     
@@ -242,38 +273,35 @@ def format_output(summary_data, top_dirs, top_types, largest_files, skipped_path
     return "\n".join(lines)
 
 
-def to_json(summary_data, top_dirs, top_types, largest_files, skipped_paths):
+def to_json(summary_data, top_dirs, top_types, largest_files, skipped_paths, fp=None):
     """
     Convert aggregated data to JSON format.
     
     Args:
         summary_data: Dict with "total_size", "file_count", "dir_count"
-        top_dirs: Dictionary of top directories with sizes
-        top_types: Dictionary of top file types with sizes and counts
+        top_dirs: List of (directory, size) tuples (already sorted)
+        top_types: List of (extension, data) tuples (already sorted)
         largest_files: List of largest file info dictionaries
         skipped_paths: List of skipped paths
+        fp: Writable text file object to stream the JSON to (None to return it)
     
     Returns:
-        str: JSON string representation
+        str: JSON string representation, or None if written to fp
     """
-    # Convert top_dirs to list of dicts
+    # Convert top_dirs to list of dicts (already sorted)
     dirs_list = [
         {"directory": dir_path, "size": size}
-        for dir_path, size in sorted(top_dirs.items(), key=lambda x: x[1], reverse=True)
+        for dir_path, size in top_dirs
     ]
     
-    # Convert top_types to list of dicts
+    # Convert top_types to list of dicts (already sorted)
     types_list = [
         {
             "extension": ext,
             "total_size": data["total_size"],
             "file_count": data["file_count"]
         }
-        for ext, data in sorted(
-            top_types.items(),
-            key=lambda x: x[1]["total_size"],
-            reverse=True
-        )
+        for ext, data in top_types
     ]
     
     # Convert largest_files to list (already sorted)
@@ -300,4 +328,88 @@ def to_json(summary_data, top_dirs, top_types, largest_files, skipped_paths):
         "skipped_paths": skipped_paths
     }
     
+    # orjson writes non-ASCII characters as-is while json escapes them, so
+    # the two only produce the same document when every string is ASCII
+    use_orjson = orjson is not None and _all_ascii(itertools.chain(
+        (dir_path for dir_path, _ in top_dirs),
+        (ext for ext, _ in top_types),
+        (f["path"] for f in files_list),
+        skipped_paths,
+    ))
+    
+    # orjson renders the whole document at once, so it is only used when
+    # the result is returned or the bytes can go straight to a UTF-8 buffer
+    buffer = None if fp is None else _utf8_buffer(fp)
+    if use_orjson and (fp is None or buffer is not None):
+        json_bytes = _orjson_dumps(output)
+        if json_bytes is not None:
+            if fp is None:
+                return json_bytes.decode("utf-8")
+            # Flush pending text so it stays ahead of the bytes
+            fp.flush()
+            buffer.write(json_bytes)
+            return None
+    
+    if fp is not None:
+        # Stream chunks to the file instead of building the whole string
+        json.dump(output, fp, indent=2)
+        return None
+    
     return json.dumps(output, indent=2)
+
+
+def _all_ascii(strings):
+    """
+    Check whether all strings are plain ASCII.
+    
+    Args:
+        strings: Iterable of strings
+    
+    Returns:
+        bool: True if no string contains a non-ASCII character
+    """
+    return all(text.isascii() for text in strings)
+
+
+def _utf8_buffer(fp):
+    """
+    Get the binary buffer underneath a UTF-8 text file object.
+    
+    Args:
+        fp: Writable text file object
+    
+    Returns:
+        Binary file object, or None if fp has no buffer or another encoding
+    """
+    buffer = getattr(fp, "buffer", None)
+    encoding = getattr(fp, "encoding", None)
+    if buffer is None or not encoding:
+        return None
+    
+    try:
+        if codecs.lookup(encoding).name != "utf-8":
+            return None
+    except LookupError:
+        return None
+    
+    return buffer
+
+
+def _orjson_dumps(obj):
+    """
+    Serialize to indented JSON with orjson, if it is installed.
+    
+    Args:
+        obj: JSON-serializable object
+    
+    Returns:
+        bytes: UTF-8 encoded JSON, or None if orjson is unavailable or cannot
+               encode obj
+    """
+    if orjson is None:
+        return None
+    
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    except orjson.JSONEncodeError:
+        return None
@@ -2,8 +2,12 @@
 Unit tests for CLI argument parsing.
 """
 
+import io
+import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 import argparse
 from unittest.mock import patch, MagicMock
@@ -12,6 +16,7 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 from diskwhy import cli
+from diskwhy import core
 
 
 class TestCLI(unittest.TestCase):
@@ -68,6 +73,12 @@ class TestCLI(unittest.TestCase):
         
         with self.assertRaises(ValueError):
             cli.parse_size("invalid")
+        
+        with self.assertRaises(ValueError):
+            cli.parse_size("1.2.3M")
+        
+        with self.assertRaises(ValueError):
+            cli.parse_size("10 M B")
     
     @patch("sys.argv", ["diskwhy", "--help"])
     def test_parse_arguments_help(self):
@@ -87,7 +98,9 @@ class TestCLI(unittest.TestCase):
             self.assertIsNone(args.older_than)
             self.assertIsNone(args.show_large_files)
             self.assertFalse(args.json)
+            self.assertFalse(args.json_only)
             self.assertFalse(args.follow_symlinks)
+            self.assertIsNone(args.jobs)
     
     def test_parse_arguments_path(self):
         """Test argument parsing with path."""
@@ -95,6 +108,34 @@ class TestCLI(unittest.TestCase):
             args = cli.parse_arguments()
             self.assertEqual(args.path, "/home/user")
     
+    def test_parse_arguments_invalid_size(self):
+        """Test that an invalid --min-size is reported as a usage error."""
+        with patch("sys.argv", ["diskwhy", "--min-size", "1X"]):
+            with patch("sys.stderr"):
+                with self.assertRaises(SystemExit) as cm:
+                    cli.parse_arguments()
+        self.assertEqual(cm.exception.code, 2)
+    
+    def test_parse_arguments_jobs(self):
+        """Test that --jobs is capped and must be positive."""
+        with patch("sys.argv", ["diskwhy", "-j", "10000"]):
+            args = cli.parse_arguments()
+            self.assertEqual(args.jobs, core.MAX_JOBS)
+        
+        for value in ("0", "-2", "many"):
+            with patch("sys.argv", ["diskwhy", "--jobs", value]):
+                with patch("sys.stderr"):
+                    with self.assertRaises(SystemExit) as cm:
+                        cli.parse_arguments()
+            self.assertEqual(cm.exception.code, 2)
+    
+    def test_parse_arguments_json_only(self):
+        """Test argument parsing with --json-only."""
+        with patch("sys.argv", ["diskwhy", "--json-only"]):
+            args = cli.parse_arguments()
+            self.assertTrue(args.json_only)
+            self.assertFalse(args.json)
+    
     def test_parse_arguments_options(self):
         """Test argument parsing with various options."""
         with patch("sys.argv", [
@@ -106,18 +147,77 @@ class TestCLI(unittest.TestCase):
             "--older-than", "90",
             "--show-large-files", "10",
             "--json",
-            "--follow-symlinks"
+            "--follow-symlinks",
+            "--jobs", "4"
         ]):
             args = cli.parse_arguments()
             self.assertEqual(args.path, "/var")
             self.assertEqual(args.top_dirs, 5)
             self.assertEqual(args.top_types, 3)
-            self.assertEqual(args.min_size, "100M")
+            self.assertEqual(args.min_size, 100 * 1000 ** 2)
             self.assertEqual(args.older_than, 90)
             self.assertEqual(args.show_large_files, 10)
             self.assertTrue(args.json)
             self.assertTrue(args.follow_symlinks)
+            self.assertEqual(args.jobs, 4)
 
+    
+    def _make_tree(self, files):
+        """Create a temporary tree of (relative path, size) files."""
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        for name, size in files:
+            file_path = os.path.join(test_dir, name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.write(b"x" * size)
+        return test_dir
+    
+    def _main_json(self, *argv):
+        """Run main with --json-only and return the parsed output."""
+        with patch("sys.argv", ["diskwhy", *argv, "--json-only"]):
+            with patch("sys.stdout", new_callable=io.StringIO) as out:
+                cli.main()
+        return json.loads(out.getvalue())
+    
+    def test_main_streaming(self):
+        """Test that serial and parallel runs aggregate without a file table."""
+        test_dir = self._make_tree([
+            ("a.txt", 100),
+            ("b.log", 200),
+            (os.path.join("subdir", "c.jpg"), 300),
+        ])
+        
+        outputs = []
+        for jobs in ("1", "2"):
+            with patch.object(core, "scan_directory", wraps=core.scan_directory) as scan:
+                outputs.append(self._main_json(test_dir, "--show-large-files", "2", "-j", jobs))
+            self.assertFalse(scan.called)
+        
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0]["summary"]["total_size"], 600)
+        self.assertEqual(outputs[0]["summary"]["file_count"], 3)
+        self.assertEqual([f["size"] for f in outputs[0]["largest_files"]], [300, 200])
+    
+    def test_main_ties(self):
+        """Test that tied sizes are ordered by path whatever the thread count."""
+        names = ("zeta", "alpha", "mid", "beta", "omega")
+        test_dir = self._make_tree([(os.path.join(name, "f.txt"), 10) for name in names])
+        
+        outputs = [
+            self._main_json(test_dir, "--top-dirs", "2", "--show-large-files", "2", "-j", jobs)
+            for jobs in ("1", "4")
+        ]
+        
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(
+            [d["directory"] for d in outputs[0]["top_directories"]],
+            [os.path.join(test_dir, "alpha"), os.path.join(test_dir, "beta")]
+        )
+        self.assertEqual(
+            [f["path"] for f in outputs[0]["largest_files"]],
+            [os.path.join(test_dir, "alpha", "f.txt"), os.path.join(test_dir, "beta", "f.txt")]
+        )
 
 if __name__ == "__main__":
     unittest.main()
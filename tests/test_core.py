@@ -8,7 +8,9 @@ import tempfile
 import shutil
 import unittest
 import time
+from contextlib import contextmanager
 from pathlib import Path
+from unittest.mock import patch
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -16,13 +18,36 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 from diskwhy import core
 
 
+class _RecordingEntry:
+    """DirEntry wrapper counting the calls made by the scanner."""
+    
+    def __init__(self, entry, calls):
+        self._entry = entry
+        self._calls = calls
+        self.name = entry.name
+        self.path = entry.path
+    
+    def is_symlink(self):
+        self._calls["is_symlink"] += 1
+        return self._entry.is_symlink()
+    
+    def is_dir(self, *, follow_symlinks=True):
+        self._calls["is_dir"] += 1
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+    
+    def stat(self, *, follow_symlinks=True):
+        self._calls["stat"] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
 class TestCore(unittest.TestCase):
     """Test cases for core module."""
     
-    def setUp(self):
-        """Set up temporary test directory structure."""
-        self.test_dir = tempfile.mkdtemp()
-        self.test_path = Path(self.test_dir)
+    @classmethod
+    def setUpClass(cls):
+        """Set up temporary test directory structure shared by all tests."""
+        cls.test_dir = tempfile.mkdtemp()
+        cls.test_path = Path(cls.test_dir)
         
         # Create test directory structure
         # test_dir/
@@ -34,21 +59,30 @@ class TestCore(unittest.TestCase):
         #     empty.txt (0 bytes)
         
         # Create files
-        (self.test_path / "file1.txt").write_bytes(b"x" * 100)
-        (self.test_path / "file2.log").write_bytes(b"x" * 200)
+        root = cls.test_dir
+        subdir = os.path.join(root, "subdir")
+        os.mkdir(subdir)
         
-        subdir = self.test_path / "subdir"
-        subdir.mkdir()
-        (subdir / "file3.txt").write_bytes(b"x" * 50)
-        (subdir / "file4.jpg").write_bytes(b"x" * 300)
-        (subdir / "empty.txt").write_bytes(b"")
+        for file_path, size in (
+            (os.path.join(root, "file1.txt"), 100),
+            (os.path.join(root, "file2.log"), 200),
+            (os.path.join(subdir, "file3.txt"), 50),
+            (os.path.join(subdir, "file4.jpg"), 300),
+            (os.path.join(subdir, "empty.txt"), 0),
+            # A file without extension
+            (os.path.join(root, "noext"), 75),
+        ):
+            with open(file_path, "wb") as f:
+                f.write(b"x" * size)
         
-        # Create a file without extension
-        (self.test_path / "noext").write_bytes(b"x" * 75)
+        # Make file4.jpg 400 days old
+        old_mtime = time.time() - 400 * 86400
+        os.utime(os.path.join(subdir, "file4.jpg"), (old_mtime, old_mtime))
     
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up temporary test directory."""
-        shutil.rmtree(self.test_dir)
+        shutil.rmtree(cls.test_dir)
     
     def test_scan_directory(self):
         """Test directory scanning."""
@@ -79,6 +113,97 @@ class TestCore(unittest.TestCase):
         self.assertEqual(files_dict[str(self.test_path / "subdir" / "empty.txt")], 0)
         self.assertEqual(files_dict[str(self.test_path / "noext")], 75)
     
+    def test_scan_directory_parallel(self):
+        """Test that threaded and serial scans find the same files."""
+        serial, _ = core.scan_directory(self.test_dir, jobs=1)
+        parallel, skipped_paths = core.scan_directory(self.test_dir, jobs=4)
+        
+        self.assertEqual(len(skipped_paths), 0)
+        self.assertEqual(
+            sorted(zip(parallel.paths, parallel.sizes)),
+            sorted(zip(serial.paths, serial.sizes))
+        )
+        
+        # Rows are grouped by directory in path order, whatever the timing
+        self.assertEqual(list(parallel.dirs), sorted(parallel.dirs))
+        again, _ = core.scan_directory(self.test_dir, jobs=4)
+        self.assertEqual(again.paths, parallel.paths)
+    
+    def test_scan_directory_parallel_skipped_sorted(self):
+        """Test that skipped paths from parallel workers come back sorted."""
+        real_scan_dir = core._scan_dir
+        
+        def skipping_scan_dir(dir_path, follow_symlinks, files_list, skipped_paths):
+            skipped_paths.append(os.path.join(dir_path, "zz-unreadable"))
+            skipped_paths.append(os.path.join(dir_path, "aa-unreadable"))
+            return real_scan_dir(dir_path, follow_symlinks, files_list, skipped_paths)
+        
+        with patch.object(core, "_scan_dir", skipping_scan_dir):
+            _, skipped_paths = core.scan_directory(self.test_dir, jobs=4)
+        
+        self.assertEqual(len(skipped_paths), 4)
+        self.assertEqual(skipped_paths, sorted(skipped_paths))
+    
+    def test_scan_directory_parallel_error(self):
+        """Test that an error in a worker thread is raised to the caller."""
+        real_scan_dir = core._scan_dir
+        
+        def failing_scan_dir(dir_path, follow_symlinks, files_list, skipped_paths):
+            if os.path.basename(dir_path) == "subdir":
+                raise RuntimeError("scan failed")
+            return real_scan_dir(dir_path, follow_symlinks, files_list, skipped_paths)
+        
+        with patch.object(core, "_scan_dir", failing_scan_dir):
+            with self.assertRaises(RuntimeError):
+                core.scan_directory(self.test_dir, jobs=4)
+    
+    def test_scan_directory_jobs_capped(self):
+        """Test that no more than MAX_JOBS scanner threads are started."""
+        with patch.object(core.threading, "Thread", wraps=core.threading.Thread) as thread:
+            core.scan_directory(self.test_dir, jobs=10000)
+        self.assertEqual(thread.call_count, core.MAX_JOBS)
+    
+    def test_scan_directory_entry_calls(self):
+        """Test that each entry is checked once and only files are stat'ed."""
+        calls = {"is_symlink": 0, "is_dir": 0, "stat": 0}
+        real_scandir = os.scandir
+        
+        @contextmanager
+        def recording_scandir(target):
+            with real_scandir(target) as it:
+                yield [_RecordingEntry(entry, calls) for entry in it]
+        
+        with patch.object(core.os, "scandir", recording_scandir):
+            files_list, _ = core.scan_directory(self.test_dir, jobs=1)
+        
+        # 6 files and 1 subdirectory
+        self.assertEqual(len(files_list), 6)
+        self.assertEqual(calls["is_symlink"], 7)
+        self.assertEqual(calls["is_dir"], 7)
+        self.assertEqual(calls["stat"], 6)
+    
+    def test_scan_directory_deep_tree(self):
+        """Test scanning a tree deeper than the recursion limit."""
+        # Built in its own directory, the shared tree must stay unchanged
+        deep_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, deep_root)
+        deep_dir = os.path.join(deep_root, *(["d"] * 150))
+        os.makedirs(deep_dir)
+        with open(os.path.join(deep_dir, "leaf.txt"), "wb") as f:
+            f.write(b"x" * 10)
+        
+        # Lower the limit below the tree depth instead of building a huge tree
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            files_list, skipped_paths = core.scan_directory(deep_root, jobs=1)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        
+        self.assertEqual(len(skipped_paths), 0)
+        self.assertEqual(len(files_list), 1)
+        self.assertIn(os.path.join(deep_dir, "leaf.txt"), files_list.paths)
+    
     def test_scan_directory_single_file(self):
         """Test scanning a single file."""
         file_path = self.test_path / "file1.txt"
@@ -97,6 +222,36 @@ class TestCore(unittest.TestCase):
         self.assertEqual(len(skipped_paths), 1)
         self.assertIn(str(nonexistent), skipped_paths)
     
+    def test_file_table(self):
+        """Test the column-oriented file table."""
+        table = core.FileTable()
+        table.append("/a/file1.txt", "/a", 100, 1000.0, ".txt")
+        table.append("/a/file2.log", "/a", 200, 2000.0, ".log")
+        
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[1], {
+            "path": "/a/file2.log",
+            "dir": "/a",
+            "size": 200,
+            "mtime": 2000.0,
+            "extension": ".log",
+        })
+        self.assertEqual([f["path"] for f in table], ["/a/file1.txt", "/a/file2.log"])
+        
+        # Slices give a list of rows
+        self.assertEqual(table[:1], [table[0]])
+        self.assertEqual([f["size"] for f in table[::-1]], [200, 100])
+        self.assertEqual(table[5:], [])
+        
+        # Select rows in the given order
+        selected = table.select([1, 0])
+        self.assertEqual(list(selected.sizes), [200, 100])
+        
+        # Extend with another table
+        table.extend(selected)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table[3]["path"], "/a/file1.txt")
+    
     def test_get_extension(self):
         """Test extension extraction."""
         self.assertEqual(core._get_extension("file.txt"), ".txt")
@@ -105,6 +260,8 @@ class TestCore(unittest.TestCase):
         self.assertEqual(core._get_extension("noext"), "no extension")
         self.assertEqual(core._get_extension(""), "no extension")
         self.assertEqual(core._get_extension(".hidden"), "no extension")
+        self.assertEqual(core._get_extension("file."), "no extension")
+        self.assertEqual(core._get_extension(".config.json"), ".json")
         self.assertEqual(core._get_extension("file.TXT"), ".txt")  # lowercase
     
     def test_aggregate_by_directory(self):
@@ -124,6 +281,27 @@ class TestCore(unittest.TestCase):
         self.assertEqual(dir_sizes[test_dir_str], 375)
         self.assertEqual(dir_sizes[subdir_str], 350)
     
+    def test_scan_directory_shares_strings(self):
+        """Test that rows share one directory and extension string object."""
+        files_list, _ = core.scan_directory(self.test_dir, jobs=1)
+        
+        by_name = {os.path.basename(f["path"]): i for i, f in enumerate(files_list)}
+        file3, file4, empty = by_name["file3.txt"], by_name["file4.jpg"], by_name["empty.txt"]
+        
+        self.assertIs(files_list.dirs[file3], files_list.dirs[file4])
+        self.assertIs(files_list.extensions[file3], files_list.extensions[empty])
+    
+    def test_aggregate_by_directory_interleaved(self):
+        """Test directory aggregation when a directory's rows are not adjacent."""
+        table = core.FileTable()
+        table.append("/a/1", "/a", 10, 0.0, "no extension")
+        table.append("/b/2", "/b", 20, 0.0, "no extension")
+        table.append("/a/3", "/a", 30, 0.0, "no extension")
+        
+        self.assertEqual(core.aggregate_by_directory(table), {"/a": 40, "/b": 20})
+        self.assertEqual(core.summarize(table)[:2], (60, {"/a": 40, "/b": 20}))
+        self.assertEqual(core.aggregate_by_directory(core.FileTable()), {})
+    
     def test_aggregate_by_filetype(self):
         """Test file type aggregation."""
         files_list, _ = core.scan_directory(self.test_dir)
@@ -151,6 +329,102 @@ class TestCore(unittest.TestCase):
         self.assertEqual(type_sizes["no extension"]["total_size"], 75)
         self.assertEqual(type_sizes["no extension"]["file_count"], 1)
     
+    def test_summarize(self):
+        """Test single-pass summary matches the separate aggregations."""
+        files_list, _ = core.scan_directory(self.test_dir)
+        total_size, dir_sizes, type_sizes = core.summarize(files_list)
+        
+        self.assertEqual(total_size, 725)
+        self.assertEqual(dir_sizes, core.aggregate_by_directory(files_list))
+        self.assertEqual(type_sizes, core.aggregate_by_filetype(files_list))
+    
+    def test_scan_and_aggregate(self):
+        """Test that the streaming scan matches scan, summarize and ranking."""
+        files_list, _ = core.scan_directory(self.test_dir, jobs=1)
+        _, expected_dirs, expected_types = core.summarize(files_list)
+        
+        dir_sizes, type_sizes, largest, skipped_paths = core.scan_and_aggregate(
+            self.test_dir, want_largest=3
+        )
+        
+        self.assertEqual(dir_sizes, expected_dirs)
+        self.assertEqual(type_sizes, expected_types)
+        self.assertEqual(largest, core.get_largest_files(files_list, 3))
+        self.assertEqual(len(skipped_paths), 0)
+    
+    def test_scan_and_aggregate_with_filters(self):
+        """Test that filters only apply to the largest files."""
+        dir_sizes, type_sizes, largest, _ = core.scan_and_aggregate(
+            self.test_dir, want_largest=5, min_size=1, older_than_days=365
+        )
+        
+        self.assertEqual(sum(dir_sizes.values()), 725)
+        self.assertEqual(sum(t["file_count"] for t in type_sizes.values()), 6)
+        self.assertEqual([f["size"] for f in largest], [300])
+        
+        # Without want_largest no files are kept
+        _, _, largest, _ = core.scan_and_aggregate(self.test_dir)
+        self.assertEqual(largest, [])
+    
+    def test_scan_and_aggregate_parallel(self):
+        """Test that threaded and serial streaming scans give the same results."""
+        serial = core.scan_and_aggregate(self.test_dir, want_largest=4, jobs=1)
+        parallel = core.scan_and_aggregate(self.test_dir, want_largest=4, jobs=4)
+        
+        self.assertEqual(parallel, serial)
+        # Directories come back sorted by path
+        self.assertEqual(list(parallel[0]), sorted(parallel[0]))
+    
+    def test_scan_and_aggregate_ties(self):
+        """Test that largest files of equal size are kept and ordered by path."""
+        tie_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tie_dir)
+        for name in ("d", "b", "e", "a", "c"):
+            with open(os.path.join(tie_dir, name), "wb") as f:
+                f.write(b"x" * 10)
+        
+        for jobs in (1, 4):
+            _, _, largest, _ = core.scan_and_aggregate(tie_dir, want_largest=3, jobs=jobs)
+            self.assertEqual(
+                [os.path.basename(f["path"]) for f in largest],
+                ["a", "b", "c"]
+            )
+    
+    def test_scan_and_aggregate_age_cutoff(self):
+        """Test that the age cutoff is computed once per scan."""
+        with patch.object(core.time, "time", wraps=time.time) as clock:
+            _, _, largest, _ = core.scan_and_aggregate(
+                self.test_dir, want_largest=5, older_than_days=365
+            )
+        
+        self.assertEqual(clock.call_count, 1)
+        self.assertEqual([f["size"] for f in largest], [300])
+    
+    def test_scan_and_aggregate_single_file(self):
+        """Test streaming scan of a single file and a non-existent path."""
+        dir_sizes, type_sizes, largest, _ = core.scan_and_aggregate(
+            self.test_path / "file1.txt", want_largest=1
+        )
+        
+        self.assertEqual(dir_sizes, {self.test_dir: 100})
+        self.assertEqual(type_sizes, {".txt": {"total_size": 100, "file_count": 1}})
+        self.assertEqual([f["size"] for f in largest], [100])
+        
+        nonexistent = self.test_path / "nonexistent"
+        dir_sizes, _, _, skipped_paths = core.scan_and_aggregate(nonexistent)
+        self.assertEqual(dir_sizes, {})
+        self.assertEqual(skipped_paths, [str(nonexistent)])
+    
+    def test_path_index(self):
+        """Test mapping file paths to row indices."""
+        files_list, _ = core.scan_directory(self.test_dir)
+        index = core.path_index(files_list)
+        
+        self.assertEqual(len(index), 6)
+        row = index[str(self.test_path / "subdir" / "file4.jpg")]
+        self.assertEqual(files_list.sizes[row], 300)
+        self.assertEqual(core.path_index(core.FileTable()), {})
+    
     def test_filter_files_by_size(self):
         """Test file filtering by size."""
         files_list, _ = core.scan_directory(self.test_dir)
@@ -162,6 +436,11 @@ class TestCore(unittest.TestCase):
         self.assertEqual(len(filtered), 3)
         sizes = {f["size"] for f in filtered}
         self.assertEqual(sizes, {100, 200, 300})
+        
+        # A filtered table slices into rows like a list of file dicts
+        first_two = filtered[:2]
+        self.assertEqual(len(first_two), 2)
+        self.assertEqual(first_two[0], filtered[0])
     
     def test_filter_files_by_age(self):
         """Test file filtering by age."""
@@ -169,11 +448,12 @@ class TestCore(unittest.TestCase):
         
         # Filter files older than 0 days (all files)
         filtered = core.filter_files(files_list, older_than_days=0)
-        self.assertEqual(len(filtered), 0)  # No files older than "now"
+        self.assertEqual(len(filtered), len(files_list))
         
-        # Filter files older than 365 days (should be all files)
+        # Filter files older than 365 days (only file4.jpg)
         filtered = core.filter_files(files_list, older_than_days=365)
-        self.assertEqual(len(filtered), len(files_list))
+        self.assertEqual(len(filtered), 1)
+        self.assertEqual(filtered[0]["size"], 300)
     
     def test_filter_files_by_size_and_age(self):
         """Test file filtering by both size and age."""
@@ -186,6 +466,17 @@ class TestCore(unittest.TestCase):
             older_than_days=365
         )
         
+        # Only file4.jpg is both >= 100 bytes and older than 365 days
+        self.assertEqual(len(filtered), 1)
+        self.assertEqual(filtered[0]["size"], 300)
+        
+        # Filter: size >= 100 AND older than 0 days
+        filtered = core.filter_files(
+            files_list,
+            min_size=100,
+            older_than_days=0
+        )
+        
         # Should have files >= 100 bytes: file1.txt, file2.log, file4.jpg
         self.assertEqual(len(filtered), 3)
     
@@ -211,6 +502,33 @@ class TestCore(unittest.TestCase):
         self.assertEqual(len(largest), 2)
         sizes = [f["size"] for f in largest]
         self.assertEqual(sizes, [300, 200])
+    
+    def test_top_k_by_size(self):
+        """Test ranking row indices by size."""
+        files_list, _ = core.scan_directory(self.test_dir)
+        
+        indices = core.top_k_by_size(files_list, 2)
+        self.assertEqual([files_list.sizes[i] for i in indices], [300, 200])
+        
+        # Filters apply before ranking
+        indices = core.top_k_by_size(files_list, 3, min_size=1, older_than_days=365)
+        self.assertEqual([files_list.sizes[i] for i in indices], [300])
+    
+    def test_top_n(self):
+        """Test selecting the N largest items."""
+        items = [("a", 5), ("b", 1), ("c", 9), ("d", 3), ("e", 7), ("f", 2)]
+        key = lambda x: x[1]
+        
+        # Heap path (N small compared to input)
+        self.assertEqual(core.top_n(items, 2, key), [("c", 9), ("e", 7)])
+        
+        # Sort path (N close to or above input size)
+        self.assertEqual(
+            core.top_n(items, 4, key),
+            [("c", 9), ("e", 7), ("a", 5), ("d", 3)]
+        )
+        self.assertEqual(len(core.top_n(items, 10, key)), 6)
+        self.assertEqual(core.top_n(items, 0, key), [])
 
 
 if __name__ == "__main__":
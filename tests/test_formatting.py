@@ -2,17 +2,39 @@
 Unit tests for formatting functions.
 """
 
+import io
 import os
 import sys
 import json
 import unittest
+from unittest.mock import patch
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+from diskwhy import core
 from diskwhy import formatting
 
 
+class _StubOrjson:
+    """Minimal stand-in for orjson built on the json module."""
+    
+    OPT_INDENT_2 = 1
+    
+    class JSONEncodeError(TypeError):
+        pass
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def dumps(self, obj, option=None):
+        self.calls += 1
+        try:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+        except UnicodeEncodeError as e:
+            raise self.JSONEncodeError(str(e))
+
+
 class TestFormatting(unittest.TestCase):
     """Test cases for formatting module."""
     
@@ -39,6 +61,9 @@ class TestFormatting(unittest.TestCase):
         self.assertIn("KiB", formatting.format_size(500 * 1024))
         self.assertIn("MiB", formatting.format_size(500 * 1024 ** 2))
         self.assertIn("GiB", formatting.format_size(500 * 1024 ** 3))
+        self.assertEqual(formatting.format_size(1024 ** 4), "1.00 TiB")
+        self.assertEqual(formatting.format_size(2048 * 1024 ** 4), "2.00 PiB")
+        self.assertEqual(formatting.format_size(2048 * 1024 ** 5), "2048.0 PiB")
     
     def test_format_percentage(self):
         """Test percentage formatting."""
@@ -51,6 +76,22 @@ class TestFormatting(unittest.TestCase):
         
         # Zero total
         self.assertEqual(formatting.format_percentage(50, 0), "0.0%")
+        
+        # Table rows round exactly like single values
+        self.assertEqual(formatting.format_percentage(15, 48), "31.2%")
+        to_percentage = formatting._percent_formatter(48)
+        for part in range(49):
+            self.assertEqual(to_percentage(part), formatting.format_percentage(part, 48))
+    
+    def test_truncate(self):
+        """Test truncation of long paths."""
+        self.assertEqual(formatting._truncate("/short/path"), "/short/path")
+        
+        long_path = "/very/long/" + "x" * 60 + "/file.txt"
+        truncated = formatting._truncate(long_path)
+        self.assertEqual(len(truncated), 48)
+        self.assertTrue(truncated.startswith("..."))
+        self.assertTrue(truncated.endswith("/file.txt"))
     
     def test_format_summary(self):
         """Test summary formatting."""
@@ -79,36 +120,40 @@ class TestFormatting(unittest.TestCase):
     
     def test_format_top_directories(self):
         """Test top directories formatting."""
-        dirs_dict = {
-            "/home/user/documents": 1024 * 1024 * 100,
-            "/home/user/downloads": 1024 * 1024 * 50,
-            "/home/user/videos": 1024 * 1024 * 200,
-        }
+        top_dirs = [
+            ("/home/user/videos", 1024 * 1024 * 200),
+            ("/home/user/documents", 1024 * 1024 * 100),
+            ("/home/user/downloads", 1024 * 1024 * 50),
+        ]
         total_size = 1024 * 1024 * 350
         
-        output = formatting.format_top_directories(dirs_dict, total_size, n=3)
+        output = formatting.format_top_directories(top_dirs, total_size, n=3)
         
         self.assertIn("Top directories by size", output)
         self.assertIn("/home/user/videos", output)
         self.assertIn("/home/user/documents", output)
         self.assertIn("/home/user/downloads", output)
-        # Should be sorted by size
+        # Should keep the given order
         videos_pos = output.find("/home/user/videos")
         documents_pos = output.find("/home/user/documents")
         downloads_pos = output.find("/home/user/downloads")
         self.assertLess(videos_pos, documents_pos)
         self.assertLess(documents_pos, downloads_pos)
+        
+        # Should show only the first N entries
+        output = formatting.format_top_directories(top_dirs, total_size, n=2)
+        self.assertNotIn("/home/user/downloads", output)
     
     def test_format_top_filetypes(self):
         """Test top file types formatting."""
-        types_dict = {
-            ".txt": {"total_size": 1024 * 100, "file_count": 50},
-            ".log": {"total_size": 1024 * 200, "file_count": 10},
-            ".jpg": {"total_size": 1024 * 300, "file_count": 5},
-        }
+        top_types = [
+            (".jpg", {"total_size": 1024 * 300, "file_count": 5}),
+            (".log", {"total_size": 1024 * 200, "file_count": 10}),
+            (".txt", {"total_size": 1024 * 100, "file_count": 50}),
+        ]
         total_size = 1024 * 600
         
-        output = formatting.format_top_filetypes(types_dict, total_size, n=3)
+        output = formatting.format_top_filetypes(top_types, total_size, n=3)
         
         self.assertIn("Top file types by size", output)
         self.assertIn(".jpg", output)
@@ -122,9 +167,9 @@ class TestFormatting(unittest.TestCase):
     def test_format_largest_files(self):
         """Test largest files formatting."""
         files_list = [
+            {"path": "/path/to/file3.jpg", "size": 1024 * 1024 * 200},
             {"path": "/path/to/file1.txt", "size": 1024 * 1024 * 100},
             {"path": "/path/to/file2.log", "size": 1024 * 1024 * 50},
-            {"path": "/path/to/file3.jpg", "size": 1024 * 1024 * 200},
         ]
         
         output = formatting.format_largest_files(files_list, n=3)
@@ -140,6 +185,18 @@ class TestFormatting(unittest.TestCase):
         self.assertLess(file3_pos, file1_pos)
         self.assertLess(file1_pos, file2_pos)
     
+    def test_format_largest_files_table(self):
+        """Test largest files formatting of a filtered FileTable."""
+        table = core.FileTable()
+        table.append("/path/to/file3.jpg", "/path/to", 300, 0.0, ".jpg")
+        table.append("/path/to/file1.txt", "/path/to", 100, 0.0, ".txt")
+        table.append("/path/to/empty.txt", "/path/to", 0, 0.0, ".txt")
+        
+        output = formatting.format_largest_files(core.filter_files(table, min_size=1), 1)
+        
+        self.assertIn("file3.jpg", output)
+        self.assertNotIn("file1.txt", output)
+    
     def test_to_json(self):
         """Test JSON output conversion."""
         summary_data = {
@@ -147,14 +204,14 @@ class TestFormatting(unittest.TestCase):
             "file_count": 50,
             "dir_count": 5,
         }
-        top_dirs = {
-            "/home/user/documents": 1024 * 1024 * 60,
-            "/home/user/downloads": 1024 * 1024 * 40,
-        }
-        top_types = {
-            ".txt": {"total_size": 1024 * 50, "file_count": 30},
-            ".log": {"total_size": 1024 * 50, "file_count": 20},
-        }
+        top_dirs = [
+            ("/home/user/documents", 1024 * 1024 * 60),
+            ("/home/user/downloads", 1024 * 1024 * 40),
+        ]
+        top_types = [
+            (".txt", {"total_size": 1024 * 50, "file_count": 30}),
+            (".log", {"total_size": 1024 * 50, "file_count": 20}),
+        ]
         largest_files = [
             {"path": "/path/to/file1.txt", "size": 1024 * 1024 * 10, "mtime": 1234567890.0},
         ]
@@ -185,6 +242,7 @@ class TestFormatting(unittest.TestCase):
         
         # Check top directories
         self.assertEqual(len(data["top_directories"]), 2)
+        self.assertEqual(data["top_directories"][0]["directory"], "/home/user/documents")
         
         # Check top file types
         self.assertEqual(len(data["top_file_types"]), 2)
@@ -192,7 +250,82 @@ class TestFormatting(unittest.TestCase):
         # Check largest files
         self.assertEqual(len(data["largest_files"]), 1)
         self.assertEqual(data["largest_files"][0]["path"], "/path/to/file1.txt")
+        
+        # Streaming to a file object produces the same document
+        buffer = io.StringIO()
+        result = formatting.to_json(
+            summary_data,
+            top_dirs,
+            top_types,
+            largest_files,
+            skipped_paths,
+            fp=buffer
+        )
+        self.assertIsNone(result)
+        self.assertEqual(buffer.getvalue(), json_str)
+    
+    def test_to_json_undecodable_path(self):
+        """Test JSON output for file names that are not valid UTF-8."""
+        summary_data = {"total_size": 10, "file_count": 1, "dir_count": 1}
+        path = os.fsdecode(b"/tmp/caf\xe9.txt")
+        largest_files = [{"path": path, "size": 10, "mtime": 1234567890.0}]
+        
+        json_str = formatting.to_json(summary_data, [], [], largest_files, [])
+        
+        data = json.loads(json_str)
+        self.assertEqual(data["largest_files"][0]["path"], path)
 
+    
+    def test_to_json_orjson(self):
+        """Test that the orjson path gives the same document as json."""
+        summary_data = {"total_size": 10, "file_count": 1, "dir_count": 1}
+        largest_files = [{"path": "/tmp/cafe.txt", "size": 10, "mtime": 1234567890.0}]
+        args = (summary_data, [("/tmp", 10)], [(".txt", {"total_size": 10, "file_count": 1})],
+                largest_files, ["/tmp/skipped"])
+        
+        with patch.object(formatting, "orjson", None):
+            expected = formatting.to_json(*args)
+        
+        stub = _StubOrjson()
+        with patch.object(formatting, "orjson", stub):
+            self.assertEqual(formatting.to_json(*args), expected)
+            self.assertEqual(stub.calls, 1)
+            
+            # UTF-8 text streams get the bytes on their buffer
+            stream = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+            stream.write("prefix\n")
+            self.assertIsNone(formatting.to_json(*args, fp=stream))
+            stream.flush()
+            self.assertEqual(stream.buffer.getvalue().decode("utf-8"), "prefix\n" + expected)
+            self.assertEqual(stub.calls, 2)
+            
+            # Other streams are written by the json module
+            buffer = io.StringIO()
+            formatting.to_json(*args, fp=buffer)
+            self.assertEqual(buffer.getvalue(), expected)
+            self.assertEqual(stub.calls, 2)
+    
+    def test_to_json_non_ascii_path(self):
+        """Test that non-ASCII names skip orjson and are escaped."""
+        summary_data = {"total_size": 10, "file_count": 1, "dir_count": 1}
+        undecodable = os.fsdecode(b"/tmp/caf\xe9.txt")
+        
+        for path in ("/tmp/café.txt", "/tmp/日本.txt", undecodable):
+            largest_files = [{"path": path, "size": 10, "mtime": 1234567890.0}]
+            
+            stub = _StubOrjson()
+            with patch.object(formatting, "orjson", stub):
+                json_str = formatting.to_json(summary_data, [], [], largest_files, [])
+                
+                # Streams that cannot encode the name still get the whole document
+                stream = io.TextIOWrapper(io.BytesIO(), encoding="ascii")
+                formatting.to_json(summary_data, [], [], largest_files, [], fp=stream)
+                stream.flush()
+            
+            self.assertEqual(stub.calls, 0)
+            json_str.encode("ascii")
+            self.assertEqual(json.loads(json_str)["largest_files"][0]["path"], path)
+            self.assertEqual(stream.buffer.getvalue().decode("ascii"), json_str)
 
 if __name__ == "__main__":
     unittest.main()